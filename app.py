@@ -1,14 +1,22 @@
 import os
+import hmac
 import tempfile
-from flask import Flask, render_template, request, send_file, flash, redirect, url_for
+from collections.abc import Mapping
+from flask import Flask, Response, render_template, request, send_file, flash, redirect, url_for, abort, g, jsonify
+from werkzeug.exceptions import RequestEntityTooLarge
 from werkzeug.utils import secure_filename
 
 # Roles 2 & 3 
 from crypto.keygen import generate_keys
 from crypto.cert import create_certificate, verify_certificate
 
+from assets import build_asset_manifest, file_etag, IMMUTABLE_MAX_AGE
+from audit import AuditLog
+from profiling import RequestProfiler
 
-app = Flask(__name__)
+
+# Static files are served from memory by static_asset() below
+app = Flask(__name__, static_folder=None)
 app.secret_key = 'csc255-group3-project'
 app.config['MAX_CONTENT_LENGTH'] = 1 * 1024 * 1024  # 1MB max file size
 
@@ -18,11 +26,86 @@ os.makedirs(TEMP_DIR, exist_ok=True)
 
 ALLOWED_EXTENSIONS = {'pem'}
 
+# Fingerprint and precompress static files once at startup
+STATIC_DIR = os.path.join(os.path.dirname(__file__), 'static')
+STATIC_ASSETS = build_asset_manifest(STATIC_DIR)
+
+# Audit trail of generations, downloads and verifications, written off the request path
+AUDIT_LOG_PATH = os.path.join(os.path.dirname(__file__), 'logs', 'audit.log')
+audit_log = AuditLog(AUDIT_LOG_PATH)
+audit_log.start()
+
+# Opt-in request profiling, switched on at runtime through /admin/profiling.
+# The admin endpoints only exist when ADMIN_TOKEN is set in the environment.
+app.config['ADMIN_TOKEN'] = os.environ.get('ADMIN_TOKEN')
+profiler = RequestProfiler()
+
 
 def allowed_file(filename):
     return '.' in filename and filename.rsplit('.', 1)[1].lower() in ALLOWED_EXTENSIONS
 
 
+@app.before_request
+def start_profiling():
+    if profiler.should_profile(request.headers):
+        g.profile_token = profiler.begin(request.endpoint or 'unmatched')
+
+
+@app.teardown_request
+def stop_profiling(exc):
+    token = g.pop('profile_token', None)
+    if token is not None:
+        profiler.end(token)
+
+
+@app.url_defaults
+def fingerprint_static_url(endpoint, values):
+    """Add the content fingerprint to static URLs so they can be cached forever"""
+    if endpoint == 'static' and 'filename' in values:
+        asset = STATIC_ASSETS.get(values['filename'])
+        if asset is not None:
+            values.setdefault('v', asset.fingerprint)
+
+
+@app.after_request
+def revalidate_pages(response):
+    """Let browsers revalidate rendered pages with an ETag instead of refetching"""
+    if (request.method == 'GET' and response.status_code == 200
+            and response.mimetype == 'text/html' and not response.direct_passthrough):
+        response.cache_control.private = True
+        response.cache_control.no_cache = True
+        response.add_etag()
+        response.make_conditional(request)
+    return response
+
+
+@app.route('/static/<path:filename>', endpoint='static')
+def static_asset(filename):
+    """Serve a precompressed static file"""
+    asset = STATIC_ASSETS.get(filename)
+    if asset is None:
+        abort(404)
+
+    encoding = asset.negotiate(request.accept_encodings)
+    response = Response(asset.variants[encoding], mimetype=asset.mimetype)
+    if encoding != 'identity':
+        response.headers['Content-Encoding'] = encoding
+    response.vary.add('Accept-Encoding')
+    response.set_etag(asset.etag(encoding))
+
+    # Only the fingerprinted URL is immutable; a bare URL must revalidate
+    if request.args.get('v') == asset.fingerprint:
+        response.cache_control.public = True
+        response.cache_control.max_age = IMMUTABLE_MAX_AGE
+        response.cache_control.immutable = True
+    else:
+        response.cache_control.no_cache = True
+
+    # Answers If-None-Match only; static files are small and always sent
+    # whole, so Range is deliberately not supported here (unlike /download)
+    return response.make_conditional(request)
+
+
 @app.route('/')
 def index():
     """Home page"""
@@ -44,6 +127,8 @@ def generate():
 
         # Store paths in session-like manner (using temp dir name as ID)
         session_id = os.path.basename(gen_dir)
+        audit_log.record('generate', outcome='success', session_id=session_id,
+                         remote_addr=request.remote_addr)
 
         return render_template('generate.html',
                              private_key=private_key_path,
@@ -52,6 +137,8 @@ def generate():
                              session_id=session_id)
 
     except Exception as e:
+        audit_log.record('generate', outcome='error', error=str(e),
+                         remote_addr=request.remote_addr)
         flash(f'Error generating keys/certificate: {str(e)}', 'error')
         return redirect(url_for('index'))
 
@@ -63,6 +150,8 @@ def download(session_id, filename):
         # Validate filename for security
         safe_filename = secure_filename(filename)
         if safe_filename not in ['private_key.pem', 'public_key.pem', 'certificate.pem']:
+            audit_log.record('download', outcome='invalid_file', session_id=session_id,
+                             filename=filename, remote_addr=request.remote_addr)
             flash('Invalid file requested', 'error')
             return redirect(url_for('index'))
 
@@ -70,12 +159,30 @@ def download(session_id, filename):
         file_path = os.path.join(TEMP_DIR, session_id, safe_filename)
 
         if not os.path.exists(file_path):
+            audit_log.record('download', outcome='not_found', session_id=session_id,
+                             filename=safe_filename, remote_addr=request.remote_addr)
             flash('File not found', 'error')
             return redirect(url_for('index'))
 
-        return send_file(file_path, as_attachment=True, download_name=safe_filename)
+        # Generated files never change, so a content hash is a strong ETag and
+        # send_file answers If-None-Match with 304 and Range with 206
+        response = send_file(file_path, as_attachment=True, download_name=safe_filename,
+                             etag=file_etag(file_path), conditional=True)
+        if safe_filename == 'private_key.pem':
+            # Never leave an unencrypted private key in the browser's cache
+            response.cache_control.no_cache = None
+            response.cache_control.no_store = True
+        else:
+            response.cache_control.private = True
+            response.cache_control.no_cache = True
+        audit_log.record('download', outcome='success', session_id=session_id,
+                         filename=safe_filename, status=response.status_code,
+                         remote_addr=request.remote_addr)
+        return response
 
     except Exception as e:
+        audit_log.record('download', outcome='error', session_id=session_id,
+                         filename=filename, error=str(e), remote_addr=request.remote_addr)
         flash(f'Error downloading file: {str(e)}', 'error')
         return redirect(url_for('index'))
 
@@ -89,16 +196,22 @@ def authenticate():
     # Handle POST - certificate upload
     try:
         if 'certificate' not in request.files:
+            audit_log.record('verify', outcome='rejected', reason='no_file',
+                             remote_addr=request.remote_addr)
             flash('No file uploaded', 'error')
             return redirect(url_for('authenticate'))
 
         file = request.files['certificate']
 
         if file.filename == '':
+            audit_log.record('verify', outcome='rejected', reason='empty_filename',
+                             remote_addr=request.remote_addr)
             flash('No file selected', 'error')
             return redirect(url_for('authenticate'))
 
         if not allowed_file(file.filename):
+            audit_log.record('verify', outcome='rejected', reason='invalid_extension',
+                             filename=file.filename, remote_addr=request.remote_addr)
             flash('Invalid file type. Please upload a .pem file', 'error')
             return redirect(url_for('authenticate'))
 
@@ -110,6 +223,8 @@ def authenticate():
 
         # Verify certificate
         is_valid = verify_certificate(cert_path)
+        audit_log.record('verify', outcome='valid' if is_valid else 'invalid',
+                         filename=filename, remote_addr=request.remote_addr)
 
         # Clean up uploaded file
         try:
@@ -123,13 +238,102 @@ def authenticate():
         else:
             return render_template('fail.html')
 
+    except RequestEntityTooLarge:
+        # Reading request.files raises this; let too_large() handle it
+        raise
+
     except Exception as e:
+        audit_log.record('verify', outcome='error', error=str(e),
+                         remote_addr=request.remote_addr)
         flash(f'Error processing certificate: {str(e)}', 'error')
         return redirect(url_for('authenticate'))
 
 
+def require_admin():
+    """Hide admin endpoints unless the request carries the configured token"""
+    token = app.config.get('ADMIN_TOKEN')
+    supplied = request.headers.get('X-Admin-Token', '')
+    if not token or not hmac.compare_digest(supplied.encode(), token.encode()):
+        abort(404)
+
+
+def parse_bool(value):
+    return str(value).lower() in ('1', 'true', 'yes', 'on')
+
+
+def read_profiling_settings(settings, from_json):
+    """Convert posted settings to configure() arguments plus a reset flag.
+
+    Form fields are strings and are parsed; JSON values must already have
+    the right type, so true is not read as a sample rate of 1.0.
+    """
+    def number(name):
+        value = settings[name]
+        if not from_json:
+            return float(value)
+        if isinstance(value, bool) or not isinstance(value, (int, float)):
+            raise TypeError(f"{name} must be a number")
+        return float(value)
+
+    def flag(name):
+        value = settings[name]
+        if not from_json:
+            return parse_bool(value)
+        if not isinstance(value, bool):
+            raise TypeError(f"{name} must be true or false")
+        return value
+
+    options = {name: convert(name)
+               for name, convert in (('enabled', flag), ('sample_rate', number), ('interval', number))
+               if name in settings}
+    reset = flag('reset') if 'reset' in settings else False
+    return options, reset
+
+
+@app.route('/admin/profiling', methods=['GET', 'POST'])
+def profiling_settings():
+    """Show or change profiler settings"""
+    require_admin()
+
+    if request.method == 'POST':
+        settings = request.get_json(silent=True)
+        from_json = settings is not None
+        if not from_json:
+            settings = request.form
+        if not isinstance(settings, Mapping):
+            return jsonify(error='Settings must be a JSON object or form fields'), 400
+        try:
+            options, reset = read_profiling_settings(settings, from_json)
+            profiler.configure(**options)
+        except (ValueError, TypeError) as e:
+            return jsonify(error=str(e)), 400
+        if reset:
+            profiler.reset()
+
+    return jsonify(enabled=profiler.enabled,
+                   sample_rate=profiler.sample_rate,
+                   interval=profiler.interval,
+                   header=profiler.header,
+                   routes=profiler.routes())
+
+
+@app.route('/admin/profiling/stacks')
+def profiling_stacks():
+    """Download collapsed stacks for flamegraph.pl or speedscope"""
+    require_admin()
+
+    route = request.args.get('route')
+    filename = f"{secure_filename(route) or 'profile'}.folded" if route else 'profile.folded'
+    response = Response(profiler.collapsed(route), mimetype='text/plain')
+    response.headers['Content-Disposition'] = f'attachment; filename={filename}'
+    response.cache_control.no_store = True
+    return response
+
+
 @app.errorhandler(413)
 def too_large(e):
+    audit_log.record('verify', outcome='rejected', reason='too_large',
+                     remote_addr=request.remote_addr)
     flash('File too large. Maximum size is 1MB', 'error')
     return redirect(url_for('authenticate'))
 
@@ -0,0 +1,85 @@
+import os
+import gzip
+import hashlib
+import mimetypes
+from functools import lru_cache
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+
+# Only text formats benefit from compression; images are already compressed
+COMPRESSIBLE_TYPES = {'text/css', 'text/html', 'text/javascript',
+                      'application/javascript', 'application/json', 'image/svg+xml'}
+
+# One year, the longest lifetime browsers honour
+IMMUTABLE_MAX_AGE = 365 * 24 * 60 * 60
+
+
+class StaticAsset:
+    """A static file held in memory with its fingerprint and precompressed variants"""
+
+    def __init__(self, filename: str, data: bytes, mimetype: str):
+        self.filename = filename
+        self.mimetype = mimetype
+        self.fingerprint = hashlib.sha256(data).hexdigest()[:16]
+        # Keyed by Content-Encoding; 'identity' is always present
+        self.variants = {'identity': data}
+
+        if mimetype in COMPRESSIBLE_TYPES:
+            gzipped = gzip.compress(data, compresslevel=9, mtime=0)
+            if len(gzipped) < len(data):
+                self.variants['gzip'] = gzipped
+            if brotli is not None:
+                brotlied = brotli.compress(data, quality=11)
+                if len(brotlied) < len(data):
+                    self.variants['br'] = brotlied
+
+    def etag(self, encoding: str) -> str:
+        if encoding == 'identity':
+            return self.fingerprint
+        return f"{self.fingerprint}-{encoding}"
+
+    def negotiate(self, accept_encodings) -> str:
+        """Pick the variant with the highest q-value the client sent; ties prefer br"""
+        best, best_quality = 'identity', 0
+        for encoding in ('br', 'gzip'):
+            quality = accept_encodings.quality(encoding)
+            if encoding in self.variants and quality > best_quality:
+                best, best_quality = encoding, quality
+        # identity is acceptable unless refused, but loses to a compressed
+        # variant unless the client explicitly ranks it higher
+        if best != 'identity' and accept_encodings['identity'] > best_quality:
+            return 'identity'
+        return best
+
+
+def build_asset_manifest(static_dir: str) -> dict:
+    """Read, fingerprint and precompress every file under static_dir"""
+    if not os.path.isdir(static_dir):
+        raise FileNotFoundError(f"Static directory not found: {static_dir}")
+
+    manifest = {}
+    for root, _, files in os.walk(static_dir):
+        for name in files:
+            path = os.path.join(root, name)
+            filename = os.path.relpath(path, static_dir).replace(os.sep, '/')
+            mimetype = mimetypes.guess_type(name)[0] or 'application/octet-stream'
+            with open(path, 'rb') as asset_file:
+                manifest[filename] = StaticAsset(filename, asset_file.read(), mimetype)
+    return manifest
+
+
+def file_etag(file_path: str) -> str:
+    """Strong ETag for a generated file; PEM files never change once written"""
+    # Hash once per file; the stat keys the cache so a rewritten file is rehashed
+    stat = os.stat(file_path)
+    return _file_digest(file_path, stat.st_mtime_ns, stat.st_size)
+
+
+@lru_cache(maxsize=1024)
+def _file_digest(file_path: str, mtime_ns: int, size: int) -> str:
+    with open(file_path, 'rb') as f:
+        return hashlib.sha256(f.read()).hexdigest()
@@ -0,0 +1,146 @@
+import os
+import json
+import time
+import atexit
+import threading
+from collections import deque
+
+
+class AuditLog:
+    """Structured audit trail written as JSON lines by a background thread.
+
+    record() only appends to an in-memory buffer, so routes never wait on
+    disk. The writer thread drains the buffer in batches, fsyncs after each
+    batch and rotates the file once it grows past max_bytes. When the buffer
+    is full new events are dropped and counted rather than blocking.
+    """
+
+    def __init__(self, path: str, capacity: int = 10000, batch_size: int = 256,
+                 flush_interval: float = 1.0, max_bytes: int = 10 * 1024 * 1024,
+                 backup_count: int = 5):
+        if capacity < 1:
+            raise ValueError(f"Capacity must be positive: {capacity}")
+
+        self.path = path
+        self.capacity = capacity
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_bytes = max_bytes
+        self.backup_count = backup_count
+        self.dropped = 0
+        self._unreported_drops = 0
+
+        self._buffer = deque()
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._stopped = threading.Event()
+        self._thread = None
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name='audit-log-writer', daemon=True)
+            self._thread.start()
+            atexit.register(self.close)
+
+    def record(self, event: str, **fields):
+        """Queue an event; returns False if it was dropped because the buffer is full"""
+        entry = {'ts': time.time(), 'event': event, **fields}
+        with self._lock:
+            if len(self._buffer) >= self.capacity:
+                self.dropped += 1
+                self._unreported_drops += 1
+                return False
+            self._buffer.append(entry)
+            pending = len(self._buffer)
+        if pending >= self.batch_size:
+            self._wakeup.set()
+        return True
+
+    def flush(self):
+        """Write everything buffered so far; called by the writer thread and on close"""
+        while True:
+            with self._lock:
+                if not self._buffer:
+                    dropped, self._unreported_drops = self._unreported_drops, 0
+                    break
+                batch = [self._buffer.popleft()
+                         for _ in range(min(self.batch_size, len(self._buffer)))]
+            try:
+                self._write(batch)
+            except OSError:
+                self._requeue(batch)
+                raise
+
+        # Record drops in the log itself so gaps in the trail are visible
+        if dropped:
+            try:
+                self._write([{'ts': time.time(), 'event': 'audit_dropped', 'count': dropped}])
+            except OSError:
+                with self._lock:
+                    self._unreported_drops += dropped
+                raise
+
+    def close(self):
+        if self._thread is not None and not self._stopped.is_set():
+            self._stopped.set()
+            self._wakeup.set()
+            self._thread.join()
+        else:
+            self.flush()
+
+    def _requeue(self, batch):
+        """Put a batch that failed to write back at the front of the buffer.
+
+        Events that no longer fit because new ones arrived in the meantime are
+        counted as dropped. A write that failed part way may be repeated, so
+        the log can contain duplicates but never silent gaps.
+        """
+        with self._lock:
+            room = max(self.capacity - len(self._buffer), 0)
+            lost = len(batch) - min(room, len(batch))
+            self._buffer.extendleft(reversed(batch[:room]))
+            self.dropped += lost
+            self._unreported_drops += lost
+
+    def _run(self):
+        while not self._stopped.is_set():
+            self._wakeup.wait(self.flush_interval)
+            self._wakeup.clear()
+            try:
+                self.flush()
+            except OSError:
+                # Keep the writer alive; the failed batch was requeued and is
+                # retried on the next wakeup
+                pass
+        try:
+            self.flush()
+        except OSError:
+            pass
+
+    def _write(self, batch):
+        data = ''.join(json.dumps(entry, default=str) + '\n' for entry in batch).encode('utf-8')
+        with open(self.path, 'ab') as log_file:
+            log_file.write(data)
+            log_file.flush()
+            os.fsync(log_file.fileno())
+            size = log_file.tell()
+        if size >= self.max_bytes:
+            try:
+                self._rotate()
+            except OSError:
+                # The batch is already on disk; rotation is retried after the next write
+                pass
+
+    def _rotate(self):
+        if self.backup_count <= 0:
+            os.remove(self.path)
+            return
+        for index in range(self.backup_count - 1, 0, -1):
+            source = f"{self.path}.{index}"
+            if os.path.exists(source):
+                os.replace(source, f"{self.path}.{index + 1}")
+        os.replace(self.path, f"{self.path}.1")
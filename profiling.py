@@ -0,0 +1,140 @@
+import os
+import sys
+import math
+import random
+import threading
+from collections import Counter, defaultdict
+
+
+# Longest pause between samples; anything slower is no longer a useful profile
+MAX_INTERVAL = 1.0
+
+
+class RequestProfiler:
+    """Sampling profiler for selected requests, aggregated per route.
+
+    While enabled, a background thread wakes every `interval` seconds and
+    records the current stack of each thread serving a profiled request.
+    Stacks are kept in collapsed form ("route;outer;inner count"), which
+    flamegraph.pl and speedscope read directly. When disabled the sampler
+    thread exits and should_profile() is a single attribute check.
+    """
+
+    def __init__(self, sample_rate: float = 0.01, interval: float = 0.005,
+                 header: str = 'X-Profile'):
+        self.enabled = False
+        self.sample_rate = sample_rate
+        self.interval = interval
+        self.header = header
+
+        self._active = {}
+        self._stacks = defaultdict(Counter)
+        self._requests = Counter()
+        self._lock = threading.Lock()
+        # Set to stop the running sampler thread; None while no sampler runs
+        self._stop = None
+
+    def configure(self, enabled=None, sample_rate=None, interval=None):
+        """Change settings; nothing is applied unless every argument is valid"""
+        if sample_rate is not None:
+            if not math.isfinite(sample_rate) or not 0.0 <= sample_rate <= 1.0:
+                raise ValueError(f"Sample rate must be between 0 and 1: {sample_rate}")
+        if interval is not None:
+            if not math.isfinite(interval) or not 0.0 < interval <= MAX_INTERVAL:
+                raise ValueError(f"Sampling interval must be between 0 and {MAX_INTERVAL}: {interval}")
+
+        if sample_rate is not None:
+            self.sample_rate = sample_rate
+        if interval is not None:
+            self.interval = interval
+        if enabled is not None:
+            if enabled:
+                self._start_sampler()
+            else:
+                self._stop_sampler()
+
+    def should_profile(self, headers) -> bool:
+        if not self.enabled:
+            return False
+        if headers.get(self.header):
+            return True
+        return random.random() < self.sample_rate
+
+    def begin(self, route: str):
+        """Start sampling the calling thread; returns a token for end()"""
+        token = threading.get_ident()
+        with self._lock:
+            self._active[token] = route
+            self._requests[route] += 1
+        return token
+
+    def end(self, token):
+        with self._lock:
+            self._active.pop(token, None)
+
+    def routes(self) -> dict:
+        """Profiled request and sample counts per route"""
+        with self._lock:
+            return {route: {'requests': self._requests[route],
+                            'samples': sum(self._stacks[route].values())}
+                    for route in self._requests}
+
+    def collapsed(self, route=None) -> str:
+        """Collapsed stacks for one route, or all routes if route is None"""
+        with self._lock:
+            routes = [route] if route is not None else sorted(self._stacks)
+            lines = [f"{stack} {count}"
+                     for name in routes
+                     for stack, count in sorted(self._stacks.get(name, {}).items())]
+        return '\n'.join(lines) + '\n' if lines else ''
+
+    def reset(self):
+        with self._lock:
+            self._stacks.clear()
+            self._requests.clear()
+
+    def _start_sampler(self):
+        # Each sampler owns its stop event, so a thread that is still winding
+        # down after a disable can never be mistaken for a live one
+        with self._lock:
+            self.enabled = True
+            if self._stop is None:
+                self._stop = threading.Event()
+                threading.Thread(target=self._run, args=(self._stop,),
+                                 name='request-profiler', daemon=True).start()
+
+    def _stop_sampler(self):
+        with self._lock:
+            self.enabled = False
+            if self._stop is not None:
+                self._stop.set()
+                self._stop = None
+
+    def _run(self, stop):
+        while not stop.wait(self.interval):
+            with self._lock:
+                active = list(self._active.items())
+            if not active:
+                continue
+
+            frames = sys._current_frames()
+            samples = []
+            for ident, route in active:
+                frame = frames.get(ident)
+                if frame is not None:
+                    samples.append((route, _collapse(route, frame)))
+
+            with self._lock:
+                for route, stack in samples:
+                    self._stacks[route][stack] += 1
+
+
+def _collapse(route: str, frame) -> str:
+    names = []
+    while frame is not None:
+        code = frame.f_code
+        names.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+        frame = frame.f_back
+    names.append(route)
+    names.reverse()
+    return ';'.join(names)
@@ -0,0 +1,115 @@
+import os
+import re
+import gzip
+import shutil
+
+from assets import build_asset_manifest, file_etag
+
+def test_assets():
+    test_dir = "temp_assets_test"
+    os.makedirs(test_dir, exist_ok=True)
+
+    css = b"body { color: black; }\n" * 50
+    with open(os.path.join(test_dir, "style.css"), "wb") as css_file:
+        css_file.write(css)
+    with open(os.path.join(test_dir, "logo.jpeg"), "wb") as logo_file:
+        logo_file.write(b"\xff\xd8\xff\xe0not really a jpeg")
+
+    print("\n---Testing asset manifest---")
+    manifest = build_asset_manifest(test_dir)
+    print("Assets found:", sorted(manifest))
+    assert sorted(manifest) == ["logo.jpeg", "style.css"]
+
+    stylesheet = manifest["style.css"]
+    print("Stylesheet fingerprint:", stylesheet.fingerprint)
+    print("Stylesheet variants:", sorted(stylesheet.variants))
+    assert gzip.decompress(stylesheet.variants["gzip"]) == css
+    assert stylesheet.etag("identity") != stylesheet.etag("gzip")
+
+    logo = manifest["logo.jpeg"]
+    print("Logo variants:", sorted(logo.variants))
+    assert list(logo.variants) == ["identity"]
+
+    print("\n---Testing file ETag---")
+    etag = file_etag(os.path.join(test_dir, "style.css"))
+    print("Stylesheet ETag:", etag)
+    assert etag == file_etag(os.path.join(test_dir, "style.css"))
+
+    shutil.rmtree(test_dir)
+    print(f"\nTemp test directory {test_dir} deleted for cleanup")
+
+def test_static_http():
+    import app
+
+    client = app.app.test_client()
+    fingerprint = app.STATIC_ASSETS["style.css"].fingerprint
+
+    print("\n---Testing fingerprinted static URLs---")
+    page = client.get("/").get_data(as_text=True)
+    print("Stylesheet link found:", f"style.css?v={fingerprint}" in page)
+    assert f"/static/style.css?v={fingerprint}" in page
+
+    response = client.get(f"/static/style.css?v={fingerprint}", headers={"Accept-Encoding": "gzip"})
+    print("Fingerprinted Cache-Control:", response.headers["Cache-Control"])
+    assert "immutable" in response.headers["Cache-Control"]
+    assert response.headers["Content-Encoding"] == "gzip"
+    assert "Accept-Encoding" in response.headers["Vary"]
+
+    print("\n---Testing encoding negotiation---")
+    for header, expected in (("br;q=0.1, gzip", "gzip"), ("gzip;q=0.5, identity", "identity"),
+                             ("gzip;q=0", "identity"), ("", "identity")):
+        response = client.get("/static/style.css", headers={"Accept-Encoding": header})
+        encoding = response.headers.get("Content-Encoding", "identity")
+        print(f"Accept-Encoding {header!r}:", encoding)
+        assert encoding == expected
+
+    response = client.get("/static/style.css")
+    print("Bare Cache-Control:", response.headers["Cache-Control"])
+    assert "immutable" not in response.headers["Cache-Control"]
+    assert "no-cache" in response.headers["Cache-Control"]
+    assert "Content-Encoding" not in response.headers
+
+    print("\n---Testing static revalidation---")
+    response = client.get("/static/style.css", headers={"If-None-Match": response.headers["ETag"]})
+    print("Revalidation status:", response.status_code)
+    assert response.status_code == 304
+
+    assert client.get("/static/missing.css").status_code == 404
+
+def test_download_http():
+    import app
+
+    client = app.app.test_client()
+
+    print("\n---Testing download caching---")
+    page = client.post("/generate").get_data(as_text=True)
+    session_id = re.search(r"/download/([^/]+)/", page).group(1)
+    cert_url = f"/download/{session_id}/certificate.pem"
+
+    response = client.get(cert_url)
+    print("Certificate Cache-Control:", response.headers["Cache-Control"])
+    assert response.status_code == 200
+    assert "no-cache" in response.headers["Cache-Control"]
+    assert "max-age" not in response.headers["Cache-Control"]
+    etag = response.headers["ETag"]
+    assert not etag.startswith("W/")
+
+    response = client.get(cert_url, headers={"If-None-Match": etag})
+    print("Revalidation status:", response.status_code)
+    assert response.status_code == 304
+
+    response = client.get(cert_url, headers={"Range": "bytes=0-9"})
+    print("Range status:", response.status_code, response.headers["Content-Range"])
+    assert response.status_code == 206
+    assert response.data == b"-----BEGIN"
+
+    response = client.get(f"/download/{session_id}/private_key.pem")
+    print("Private key Cache-Control:", response.headers["Cache-Control"])
+    assert "no-store" in response.headers["Cache-Control"]
+
+    shutil.rmtree(os.path.join(app.TEMP_DIR, session_id))
+
+if __name__ == "__main__":
+    test_assets()
+    test_static_http()
+    test_download_http()
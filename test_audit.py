@@ -0,0 +1,71 @@
+import os
+import json
+import shutil
+
+from audit import AuditLog
+
+def test_audit():
+    test_dir = "temp_audit_test"
+    os.makedirs(test_dir, exist_ok=True)
+    log_path = os.path.join(test_dir, "audit.log")
+
+    print("\n---Testing batched writes---")
+    audit_log = AuditLog(log_path, capacity=3)
+    for index in range(5):
+        accepted = audit_log.record("generate", outcome="success", index=index)
+        print(f"Event {index} accepted:", accepted)
+    print("Dropped events:", audit_log.dropped)
+    assert audit_log.dropped == 2
+
+    audit_log.flush()
+    with open(log_path) as log_file:
+        entries = [json.loads(line) for line in log_file]
+    print("Logged events:", [entry["event"] for entry in entries])
+    assert [entry.get("index") for entry in entries[:3]] == [0, 1, 2]
+    assert entries[3] == {"ts": entries[3]["ts"], "event": "audit_dropped", "count": 2}
+
+    audit_log.flush()
+    with open(log_path) as log_file:
+        line_count = len(log_file.readlines())
+    print("Lines after second flush:", line_count)
+    assert line_count == 4
+    assert audit_log.dropped == 2
+
+    print("\n---Testing rotation---")
+    audit_log = AuditLog(log_path, batch_size=1, max_bytes=200, backup_count=2)
+    audit_log.start()
+    for index in range(20):
+        audit_log.record("verify", outcome="valid", index=index)
+    audit_log.close()
+    print("Log files:", sorted(os.listdir(test_dir)))
+    assert sorted(os.listdir(test_dir)) == ["audit.log", "audit.log.1", "audit.log.2"]
+
+    print("\n---Testing failed writes---")
+    for name in os.listdir(test_dir):
+        os.remove(os.path.join(test_dir, name))
+    # A directory in place of the log file makes every write fail
+    os.makedirs(log_path)
+    audit_log = AuditLog(log_path, capacity=3)
+    for index in range(4):
+        audit_log.record("download", outcome="success", index=index)
+    try:
+        audit_log.flush()
+        assert False, "Expected OSError"
+    except OSError as e:
+        print("Write failed:", e)
+    print("Events still buffered:", len(audit_log._buffer))
+    assert len(audit_log._buffer) == 3
+
+    os.rmdir(log_path)
+    audit_log.flush()
+    with open(log_path) as log_file:
+        entries = [json.loads(line) for line in log_file]
+    print("Logged after retry:", [entry["event"] for entry in entries])
+    assert [entry.get("index") for entry in entries[:3]] == [0, 1, 2]
+    assert entries[3]["event"] == "audit_dropped" and entries[3]["count"] == 1
+
+    shutil.rmtree(test_dir)
+    print(f"\nTemp test directory {test_dir} deleted for cleanup")
+
+if __name__ == "__main__":
+    test_audit()
@@ -0,0 +1,139 @@
+import time
+
+from profiling import RequestProfiler
+
+def busy_work(seconds):
+    end = time.time() + seconds
+    while time.time() < end:
+        pass
+
+def test_profiling():
+    profiler = RequestProfiler(sample_rate=0.0, interval=0.001)
+
+    print("\n---Testing disabled profiler---")
+    print("Profile with header while off:", profiler.should_profile({"X-Profile": "1"}))
+    assert not profiler.should_profile({"X-Profile": "1"})
+
+    print("\n---Testing sampling---")
+    profiler.configure(enabled=True)
+    assert profiler.should_profile({"X-Profile": "1"})
+    assert not profiler.should_profile({})
+
+    token = profiler.begin("generate")
+    busy_work(0.1)
+    profiler.end(token)
+
+    stats = profiler.routes()
+    print("Route stats:", stats)
+    assert stats["generate"]["requests"] == 1
+    assert stats["generate"]["samples"] > 0
+
+    collapsed = profiler.collapsed("generate")
+    print("First collapsed stack:", collapsed.splitlines()[0])
+    assert all(line.startswith("generate;") for line in collapsed.splitlines())
+    assert "busy_work" in collapsed
+
+    print("\n---Testing invalid settings---")
+    for settings in ({"sample_rate": 1.5}, {"sample_rate": float("nan")},
+                     {"interval": 0}, {"interval": float("inf")}, {"interval": float("nan")},
+                     {"interval": 60}):
+        try:
+            profiler.configure(**settings)
+            assert False, f"Expected ValueError for {settings}"
+        except ValueError as e:
+            print("Rejected:", e)
+    assert profiler.enabled and profiler._stop is not None
+
+    print("\n---Testing rejected settings change nothing---")
+    try:
+        profiler.configure(enabled=False, sample_rate=0.9, interval=60)
+        assert False, "Expected ValueError"
+    except ValueError as e:
+        print("Rejected:", e)
+    print("Settings after rejection:", profiler.enabled, profiler.sample_rate, profiler.interval)
+    assert (profiler.enabled, profiler.sample_rate, profiler.interval) == (True, 0.0, 0.001)
+
+    print("\n---Testing restart after disable---")
+    profiler.reset()
+    for _ in range(50):
+        profiler.configure(enabled=False)
+        profiler.configure(enabled=True)
+    token = profiler.begin("generate")
+    busy_work(0.05)
+    profiler.end(token)
+    print("Samples after restarts:", profiler.routes()["generate"]["samples"])
+    assert profiler.routes()["generate"]["samples"] > 0
+
+    profiler.configure(enabled=False)
+    profiler.reset()
+    assert profiler.collapsed() == ""
+
+def test_profiling_admin_http():
+    import app
+
+    client = app.app.test_client()
+    admin = {"X-Admin-Token": "test-token"}
+    saved_token = app.app.config.get("ADMIN_TOKEN")
+
+    print("\n---Testing admin access---")
+    app.app.config["ADMIN_TOKEN"] = None
+    print("Status with no token configured:", client.get("/admin/profiling", headers=admin).status_code)
+    assert client.get("/admin/profiling", headers=admin).status_code == 404
+    assert client.get("/admin/profiling/stacks", headers=admin).status_code == 404
+
+    app.app.config["ADMIN_TOKEN"] = "test-token"
+    try:
+        wrong = {"X-Admin-Token": "wrong"}
+        print("Status with wrong token:", client.get("/admin/profiling", headers=wrong).status_code)
+        assert client.get("/admin/profiling", headers=wrong).status_code == 404
+        assert client.get("/admin/profiling").status_code == 404
+        assert client.post("/admin/profiling", json={"enabled": True}, headers=wrong).status_code == 404
+        assert not app.profiler.enabled
+
+        print("\n---Testing admin settings---")
+        for body in ([1, 2], {"sample_rate": None}, {"interval": "inf"}, {"sample_rate": True},
+                     {"enabled": None}, {"enabled": "yes"}, {"reset": 1}):
+            response = client.post("/admin/profiling", json=body, headers=admin)
+            print(f"Status for {body}:", response.status_code)
+            assert response.status_code == 400
+
+        print("\n---Testing rejected admin settings change nothing---")
+        before = client.get("/admin/profiling", headers=admin).json
+        response = client.post("/admin/profiling", json={"enabled": True, "sample_rate": 0.9,
+                                                         "interval": 60}, headers=admin)
+        after = client.get("/admin/profiling", headers=admin).json
+        print("Status:", response.status_code, "settings unchanged:", before == after)
+        assert response.status_code == 400
+        assert [after[key] for key in ("enabled", "sample_rate", "interval")] == \
+               [before[key] for key in ("enabled", "sample_rate", "interval")]
+
+        response = client.post("/admin/profiling", data={"sample_rate": "0.5", "reset": "yes"},
+                               headers=admin)
+        assert response.status_code == 200 and response.json["sample_rate"] == 0.5
+
+        response = client.post("/admin/profiling", json={"enabled": True, "sample_rate": 0,
+                                                         "interval": 0.001, "reset": True},
+                               headers=admin)
+        assert response.status_code == 200 and response.json["enabled"]
+
+        print("\n---Testing X-Profile header---")
+        client.get("/", headers={"X-Profile": "1"})
+        client.get("/")
+        routes = client.get("/admin/profiling", headers=admin).json["routes"]
+        print("Profiled routes:", routes)
+        assert routes["index"]["requests"] == 1
+        assert app.profiler._active == {}
+
+        response = client.get("/admin/profiling/stacks?route=index", headers=admin)
+        print("Stacks download:", response.headers["Content-Disposition"])
+        assert response.status_code == 200
+        assert response.headers["Content-Disposition"] == "attachment; filename=index.folded"
+        assert "no-store" in response.headers["Cache-Control"]
+    finally:
+        app.profiler.configure(enabled=False)
+        app.profiler.reset()
+        app.app.config["ADMIN_TOKEN"] = saved_token
+
+if __name__ == "__main__":
+    test_profiling()
+    test_profiling_admin_http()